@@ -1,21 +1,23 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
+from typing import AsyncIterator
 from dotenv import load_dotenv
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Use the asyncpg driver for plain PostgreSQL URLs
+for _scheme in ("postgresql://", "postgres://"):
+    if SQLALCHEMY_DATABASE_URL and SQLALCHEMY_DATABASE_URL.startswith(_scheme):
+        SQLALCHEMY_DATABASE_URL = "postgresql+asyncpg://" + SQLALCHEMY_DATABASE_URL[len(_scheme):]
+
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, pool_size=20, max_overflow=10)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -12,9 +12,6 @@ from app.models.journal import User, JournalEntry
 from app.db.session import engine, Base
 from app.db.session import get_db
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 # Create FastAPI app
 app = FastAPI(
     title="MindfulAI API",
@@ -24,15 +21,50 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# CORS middleware configuration
+# CORS middleware configuration; APP_ORIGIN is a comma-separated list of
+# allowed origins (e.g. the React Native app's URL)
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("APP_ORIGIN", "http://localhost:8081").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with your React Native app's URL
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["authorization", "content-type", "if-none-match"],
+    expose_headers=["etag"],
 )
 
+# Create database tables
+@app.on_event("startup")
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+# Load, warm up and start the ASR model with the application
+from app.services import asr_cache
+from app.services.audio_processor import (
+    configure_cpu_threads,
+    stop_batch_scheduler,
+    warmup_asr_model
+)
+
+@app.on_event("startup")
+async def start_asr_scheduler():
+    configure_cpu_threads()
+    
+    # Pay model load and kernel warm-up costs before serving requests; this
+    # also starts the batch scheduler (faster-whisper batches internally)
+    await warmup_asr_model()
+
+@app.on_event("shutdown")
+async def stop_asr_scheduler():
+    await stop_batch_scheduler()
+    await asr_cache.close_client()
+
 # Include API routers
 from app.api.endpoints import audio as audio_endpoints
 app.include_router(audio_endpoints.router, prefix="/api", tags=["Audio Processing"])
@@ -10,7 +10,7 @@ class JournalEntry(Base):
     content = Column(Text, nullable=False)
     audio_path = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     def __repr__(self):
         return f"<JournalEntry(id={self.id}, user_id={self.user_id}, created_at={self.created_at})>"
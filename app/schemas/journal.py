@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 
 class JournalEntryBase(BaseModel):
@@ -25,12 +25,9 @@ class JournalEntryResponse(JournalEntryBase):
             datetime: lambda v: v.isoformat()
         }
 
+# Final line of the /transcribe/ NDJSON stream
 class AudioTranscriptionResponse(BaseModel):
     status: str
     text: str
-    audio_path: str
-    
-    class Config:
-        json_encoders = {
-            'bytes': lambda v: v.decode('utf-8') if isinstance(v, bytes) else v
-        }
+    audio_path: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Transcription details such as model, duration and segment count")
@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import logging
+import asyncio
+from typing import Optional
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.3"))  # seconds
+DEFAULT_TTL = 86400 * 14  # two weeks
+
+_client: Optional[redis.Redis] = None
+
+def get_client() -> redis.Redis:
+    """Return the shared Redis client, creating it on first use"""
+    global _client
+
+    if _client is None:
+        # Short timeouts so an unreachable Redis degrades to a cache miss
+        # instead of stalling every transcription
+        _client = redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=REDIS_TIMEOUT,
+            socket_timeout=REDIS_TIMEOUT
+        )
+
+    return _client
+
+async def close_client() -> None:
+    """Close the shared Redis client if it was created"""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _key(audio_hash: str, language: Optional[str], model: str) -> str:
+    return f"asr:v1:{model}:{audio_hash}:{language or 'auto'}"
+
+def _hash_file_sync(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):  # 1MB chunks
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _hash_bytes_sync(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+async def hash_bytes(data) -> str:
+    """Compute the SHA-256 of in-memory audio content without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _hash_bytes_sync, data
+    )
+
+async def hash_file(file_path: str) -> str:
+    """Compute the SHA-256 of a file's content without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _hash_file_sync, file_path
+    )
+
+async def get_cached(
+    audio_hash: str,
+    language: Optional[str],
+    model: str
+) -> Optional[dict]:
+    """Return the cached transcription payload, or None on a miss or Redis error"""
+    try:
+        payload = await get_client().get(_key(audio_hash, language, model))
+        return json.loads(payload) if payload else None
+    except Exception as e:
+        logger.warning(f"ASR cache lookup failed: {str(e)}")
+        return None
+
+async def put(
+    audio_hash: str,
+    language: Optional[str],
+    model: str,
+    payload: dict,
+    ttl: int = DEFAULT_TTL
+) -> None:
+    """Store a transcription payload; Redis errors are logged and ignored"""
+    try:
+        await get_client().set(
+            _key(audio_hash, language, model),
+            json.dumps(payload),
+            ex=ttl
+        )
+    except Exception as e:
+        logger.warning(f"ASR cache store failed: {str(e)}")
@@ -1,42 +1,219 @@
 # /Users/akhil/Documents/MIndfulAI/backend/app/services/audio_processor.py
+import io
 import os
+import re
+import asyncio
 import logging
+import threading
+import subprocess
+import tempfile
+from contextlib import contextmanager
 import torch
 import numpy as np
-from pydub import AudioSegment
-from typing import Optional, Tuple
+import librosa
+import soundfile as sf
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple, Union
+import transformers
+from packaging import version
 from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
 
+from app.services import asr_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ASR backend selection: "transformers" runs GLM ASR Nano-2512, "faster-whisper"
+# runs a Whisper model on the CTranslate2 engine
+ASR_BACKEND = os.getenv("ASR_BACKEND", "transformers")
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL_NAME", "large-v3")
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "16"))
+
+# Model identifier reported in metadata and used to version cached transcripts
+ASR_MODEL_TAG = (
+    f"faster-whisper-{WHISPER_MODEL_NAME}"
+    if ASR_BACKEND == "faster-whisper"
+    else "GLM-ASR-Nano-2512"
+)
+
 # Global model and processor instances
 _model = None
 _processor = None
+_log_mel = None
+_whisper_model = None
+_whisper_pipeline = None
+
+# Sample rate expected by the ASR feature extractors
+TARGET_SAMPLE_RATE = 16000
+
+# Formats libsndfile decodes natively; everything else goes through ffmpeg
+SOUNDFILE_EXTENSIONS = (".wav", ".flac", ".ogg")
+
+# Matches runs of whitespace collapsed by clean_text
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Audio accepted for transcription: a file path, raw file bytes, or
+# already decoded 16kHz mono float32 samples
+AudioSource = Union[str, bytes, np.ndarray]
+
+# Dynamic batching configuration
+ASR_MAX_BATCH = int(os.getenv("ASR_MAX_BATCH", "8"))
+ASR_MAX_WAIT_MS = float(os.getenv("ASR_MAX_WAIT_MS", "10"))
+
+# CPU inference tuning; defaults to one thread per physical core (assuming SMT)
+ASR_NUM_THREADS = int(os.getenv("ASR_NUM_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+ASR_TORCH_COMPILE = os.getenv("ASR_TORCH_COMPILE", "0") == "1"
+
+# Attention kernels for the transformers model; "sdpa" uses fused
+# scaled-dot-product attention and falls back to "eager" if unsupported
+ASR_ATTN_IMPLEMENTATION = os.getenv("ASR_ATTN_IMPLEMENTATION", "sdpa")
+
+# Global batch scheduler instance
+_scheduler = None
+
+# Long recordings are split on speech boundaries into chunks of at most one
+# 30 second model window each
+VAD_CHUNK_SAMPLES = 30 * TARGET_SAMPLE_RATE
+_vad_model = None
+_vad_lock = threading.Lock()
+
+# Oldest transformers release whose speech seq2seq decoders reuse the kv-cache
+# instead of re-concatenating cached keys/values on every decoding step
+MIN_TRANSFORMERS_VERSION = "4.30"
+
+def check_transformers_kv_cache():
+    """Fail fast if the installed transformers predates the kv-cache fix"""
+    if version.parse(transformers.__version__) < version.parse(MIN_TRANSFORMERS_VERSION):
+        raise RuntimeError(
+            f"transformers {transformers.__version__} is too old; "
+            f">= {MIN_TRANSFORMERS_VERSION} is required for kv-cache reuse during decoding"
+        )
+
+def configure_cpu_threads():
+    """Tune PyTorch CPU threading for inference when no GPU is available"""
+    if torch.cuda.is_available():
+        return
+        
+    # Keep OpenMP users loaded later (and child processes) in line with torch
+    os.environ.setdefault("OMP_NUM_THREADS", str(ASR_NUM_THREADS))
+    torch.set_num_threads(ASR_NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before the first inter-op parallel work runs
+        logger.warning("Could not set inter-op threads; parallel work already started")
+    torch.backends.mkldnn.enabled = True
+    
+    logger.info(f"Configured PyTorch CPU inference with {ASR_NUM_THREADS} threads")
+
+def _select_dtype() -> torch.dtype:
+    """fp16 on CUDA, bf16 on CPUs with native AVX-512 BF16 support, fp32 otherwise"""
+    if torch.cuda.is_available():
+        return torch.float16
+    if getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)():
+        return torch.bfloat16
+    return torch.float32
+
+class LogMelExtractor:
+    """
+    Whisper-style log-mel features computed with torch from a cached filterbank.
+    
+    The mel filterbank, STFT window and framing parameters are taken from the
+    processor's feature extractor once at load time, and a whole batch of
+    chunks is transformed with a single batched STFT and matmul instead of
+    running the processor for every request.
+    """
+
+    def __init__(self, feature_extractor):
+        self.n_fft = feature_extractor.n_fft
+        self.hop_length = feature_extractor.hop_length
+        self.n_samples = feature_extractor.n_samples
+        # (n_freq, n_mels) -> (n_mels, n_freq) for a left matmul
+        self.mel_filters = torch.from_numpy(
+            np.ascontiguousarray(feature_extractor.mel_filters.T, dtype=np.float32)
+        )
+        self.window = torch.hann_window(self.n_fft)
+
+    @staticmethod
+    def supports(feature_extractor) -> bool:
+        return all(
+            hasattr(feature_extractor, name)
+            for name in ("mel_filters", "n_fft", "hop_length", "n_samples")
+        )
+
+    def __call__(self, chunks: List[np.ndarray]) -> np.ndarray:
+        """Return (len(chunks), n_mels, frames) features for 16kHz mono chunks"""
+        # Pad or truncate every chunk to the model window
+        waveforms = torch.zeros((len(chunks), self.n_samples), dtype=torch.float32)
+        for row, chunk in enumerate(chunks):
+            chunk = chunk[:self.n_samples]
+            waveforms[row, :len(chunk)] = torch.from_numpy(chunk)
+        
+        with torch.inference_mode():
+            stft = torch.stft(
+                waveforms,
+                self.n_fft,
+                self.hop_length,
+                window=self.window,
+                return_complex=True
+            )
+            magnitudes = stft[..., :-1].abs().square_()
+            
+            log_spec = torch.matmul(self.mel_filters, magnitudes).clamp_(min=1e-10).log10_()
+            floor = log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0
+            log_spec = torch.maximum(log_spec, floor).add_(4.0).div_(4.0)
+            
+        return log_spec.numpy()
 
 async def load_glm_model():
     """Load the GLM ASR Nano-2512 model asynchronously"""
-    global _model, _processor
+    global _model, _processor, _log_mel
     
     if _model is None or _processor is None:
         try:
             model_name = "THUDM/glm-asr-nano-2512"
+            check_transformers_kv_cache()
             
             # Load model and processor
             _processor = AutoProcessor.from_pretrained(model_name)
-            _model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+            load_kwargs = dict(
+                torch_dtype=_select_dtype(),
                 low_cpu_mem_usage=True,
                 use_safetensors=True
             )
+            try:
+                _model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                    model_name,
+                    attn_implementation=ASR_ATTN_IMPLEMENTATION,
+                    **load_kwargs
+                )
+            except ValueError as e:
+                # Raised for architectures that do not support the requested kernels
+                if ASR_ATTN_IMPLEMENTATION == "eager":
+                    raise
+                logger.warning(
+                    f"attn_implementation={ASR_ATTN_IMPLEMENTATION!r} unavailable, "
+                    f"falling back to eager attention: {str(e)}"
+                )
+                _model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                    model_name,
+                    attn_implementation="eager",
+                    **load_kwargs
+                )
             
             # Move model to GPU if available
             if torch.cuda.is_available():
                 _model = _model.to("cuda")
                 
-            logger.info("GLM ASR Nano-2512 model loaded successfully")
+            # Cache the mel filterbank for the torch feature path
+            if LogMelExtractor.supports(_processor.feature_extractor):
+                _log_mel = LogMelExtractor(_processor.feature_extractor)
+                
+            # Compile the forward pass used by every decoding step of generate
+            if ASR_TORCH_COMPILE:
+                _model.forward = torch.compile(_model.forward, mode="reduce-overhead")
+                
+            logger.info(f"GLM ASR Nano-2512 model loaded successfully ({_model.dtype})")
             
         except Exception as e:
             logger.error(f"Failed to load GLM ASR model: {str(e)}")
@@ -44,105 +221,645 @@ async def load_glm_model():
             
     return _model, _processor
 
-def convert_audio_format(audio_file_path: str, target_format: str = "wav") -> str:
-    """Convert audio file to target format using pydub"""
+async def load_whisper_model():
+    """Load the faster-whisper (CTranslate2) batched pipeline asynchronously"""
+    global _whisper_model, _whisper_pipeline
+    
+    if _whisper_pipeline is None:
+        try:
+            from faster_whisper import BatchedInferencePipeline, WhisperModel
+            
+            # int8 weights halve memory bandwidth; keep fp16 activations on GPU
+            cuda = torch.cuda.is_available()
+            _whisper_model = WhisperModel(
+                WHISPER_MODEL_NAME,
+                device="cuda" if cuda else "cpu",
+                compute_type="int8_float16" if cuda else "int8",
+                num_workers=2
+            )
+            
+            # Split audio on VAD boundaries and batch the segments through the model
+            _whisper_pipeline = BatchedInferencePipeline(model=_whisper_model)
+            
+            logger.info(f"faster-whisper model {WHISPER_MODEL_NAME} loaded successfully")
+            
+        except Exception as e:
+            logger.error(f"Failed to load faster-whisper model: {str(e)}")
+            raise
+            
+    return _whisper_pipeline
+
+@contextmanager
+def inference_context(model):
+    """Inference mode, with fp16 autocast when the model runs on CUDA"""
+    with torch.inference_mode(), torch.autocast(
+        "cuda",
+        dtype=torch.float16,
+        enabled=model.device.type == "cuda"
+    ):
+        yield
+
+class BatchScheduler:
+    """
+    Collect concurrent transcription requests into a single batched generate call.
+
+    Requests are queued as (input_features, future) pairs. The background loop
+    waits for the first request, then keeps draining the queue for up to
+    max_wait_ms or until max_batch requests are collected, and runs them
+    through the model together.
+    """
+
+    def __init__(
+        self,
+        model,
+        processor,
+        max_batch: int = ASR_MAX_BATCH,
+        max_wait_ms: float = ASR_MAX_WAIT_MS,
+        **generate_kwargs
+    ):
+        self.model = model
+        self.processor = processor
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.generate_kwargs = {"num_beams": 5, "use_cache": True, **generate_kwargs}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._decoder_prompt_ids = {}
+        
+        # Batch-major staging buffer that each request's features are written
+        # into row by row, plus a persistent device copy when running on CUDA
+        self._lock = threading.Lock()
+        self._staging = None
+        self._device_buffer = None
+        feature_extractor = processor.feature_extractor
+        self._allocate_staging(
+            getattr(feature_extractor, "feature_size", 80),
+            getattr(feature_extractor, "nb_max_frames", 3000)
+        )
+
+    def _allocate_staging(self, n_mels: int, n_frames: int):
+        cuda = self.model.device.type == "cuda"
+        self._staging = torch.empty(
+            (self.max_batch, n_mels, n_frames),
+            dtype=self.model.dtype,
+            pin_memory=cuda
+        )
+        self._device_buffer = (
+            torch.empty_like(self._staging, device=self.model.device) if cuda else None
+        )
+
+    def start(self):
+        """Start the background batching loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Cancel the background batching loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(
+        self,
+        input_features: np.ndarray,
+        language: Optional[str] = None
+    ) -> Tuple[str, dict]:
+        """Queue (n_mels, frames) input features for transcription and wait for the result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((input_features, language, future))
+        return await future
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            
+            # Drain further requests until the batch is full or the window closes
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Skip requests whose callers have gone away, and group the rest
+            # by language since the decoder prompt is shared by the batch
+            groups = {}
+            for features, language, future in batch:
+                if not future.done():
+                    groups.setdefault(language, []).append((features, future))
+                    
+            for language, group in groups.items():
+                try:
+                    texts = await loop.run_in_executor(
+                        None,
+                        self._run_batch,
+                        [features for features, _ in group],
+                        language
+                    )
+                except Exception as e:
+                    logger.error(f"Batched transcription failed: {str(e)}")
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future), text in zip(group, texts):
+                    if not future.done():
+                        future.set_result((text, {"batch_size": len(group)}))
+
+    def _run_batch(self, features: List[np.ndarray], language: Optional[str]) -> List[str]:
+        """Stage and decode a batch of input features (runs in a worker thread)"""
+        # The staging buffers are reused by every batch, so hold them until
+        # generation has finished reading from them
+        with self._lock:
+            input_features = self._stage(features)
+            return self._generate(input_features, language)
+
+    def _stage(self, features: List[np.ndarray]) -> torch.Tensor:
+        """Write each request's features into its row of the staging buffer"""
+        batch_size = len(features)
+        n_mels = features[0].shape[0]
+        max_len = max(f.shape[-1] for f in features)
+        
+        _, staged_mels, staged_frames = self._staging.shape
+        if n_mels != staged_mels or max_len > staged_frames:
+            # Features larger than the extractor advertised; grow once to fit
+            self._allocate_staging(n_mels, max(max_len, staged_frames))
+            
+        # Pad shorter features with zeros along the time dimension
+        for row, f in enumerate(features):
+            length = f.shape[-1]
+            self._staging[row, :, :length].copy_(torch.from_numpy(f))
+            self._staging[row, :, length:max_len].zero_()
+            
+        staged = self._staging[:batch_size, :, :max_len]
+        if self._device_buffer is None:
+            return staged
+            
+        # Asynchronous copy from pinned host memory to the device
+        device_staged = self._device_buffer[:batch_size, :, :max_len]
+        device_staged.copy_(staged, non_blocking=True)
+        return device_staged
+
+    def _decoder_prompt(self, language: Optional[str]):
+        """Language/task prompt token IDs, computed once per language"""
+        if not language or not hasattr(self.processor, "get_decoder_prompt_ids"):
+            return None
+        if language not in self._decoder_prompt_ids:
+            self._decoder_prompt_ids[language] = self.processor.get_decoder_prompt_ids(
+                language=language,
+                task="transcribe"
+            )
+        return self._decoder_prompt_ids[language]
+
+    def _generate(self, input_features: torch.Tensor, language: Optional[str]) -> List[str]:
+        generate_kwargs = self.generate_kwargs
+        forced_decoder_ids = self._decoder_prompt(language)
+        if forced_decoder_ids:
+            generate_kwargs = {**generate_kwargs, "forced_decoder_ids": forced_decoder_ids}
+            
+        with inference_context(self.model):
+            predicted_ids = self.model.generate(input_features, **generate_kwargs)
+            
+        return self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+
+async def get_batch_scheduler() -> BatchScheduler:
+    """Return the global batch scheduler, creating and starting it if needed"""
+    global _scheduler
+    
+    if _scheduler is None:
+        model, processor = await load_glm_model()
+        _scheduler = BatchScheduler(model, processor)
+        
+    _scheduler.start()
+    return _scheduler
+
+async def stop_batch_scheduler():
+    """Stop the global batch scheduler if it is running"""
+    global _scheduler
+    
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
+
+def _warmup_whisper(pipeline):
+    """Run a silent clip through the faster-whisper model (blocking)"""
+    dummy = np.zeros(16000 * 15, dtype=np.float32)
+    
+    # The VAD filter would drop pure silence, so bypass the pipeline and
+    # decode directly with the underlying model
+    segments, _ = pipeline.model.transcribe(dummy, vad_filter=False)
+    for _ in segments:
+        pass
+
+async def warmup_asr_model():
+    """Load the configured ASR model and run a warm-up transcription
+
+    For the transformers backend this also starts the batch scheduler.
+    """
     try:
-        audio = AudioSegment.from_file(audio_file_path)
-        temp_path = f"{os.path.splitext(audio_file_path)[0]}.{target_format}"
-        audio.export(temp_path, format=target_format)
-        return temp_path
+        loop = asyncio.get_running_loop()
+        
+        if ASR_BACKEND == "faster-whisper":
+            pipeline = await load_whisper_model()
+            await loop.run_in_executor(None, _warmup_whisper, pipeline)
+        else:
+            # Go through the same feature extraction, staging buffers and
+            # generation settings as real requests
+            scheduler = await get_batch_scheduler()
+            dummy = np.zeros(TARGET_SAMPLE_RATE * 15, dtype=np.float32)
+            _, input_features = await loop.run_in_executor(
+                None, _prepare_features, scheduler.processor, dummy
+            )
+            await scheduler.submit(input_features[0], "en")
+            
+        logger.info("ASR model warm-up completed")
+        
     except Exception as e:
-        logger.error(f"Audio conversion failed: {str(e)}")
+        logger.error(f"ASR model warm-up failed: {str(e)}")
         raise
 
+def _start_whisper_transcription(
+    pipeline,
+    audio: Union[str, BinaryIO, np.ndarray],
+    language: Optional[str],
+    beam_size: int,
+    batch_size: int
+):
+    """Run faster-whisper VAD and language detection (blocking, runs in a worker thread)"""
+    # Segments are decoded lazily, batch by batch, while iterating
+    return pipeline.transcribe(
+        audio,
+        language=language,
+        beam_size=beam_size,
+        batch_size=batch_size,
+        vad_filter=True
+    )
+
+def _run_ffmpeg(source: str, stdin: Optional[bytes] = None) -> np.ndarray:
+    proc = subprocess.run(
+        [
+            "ffmpeg", "-loglevel", "error",
+            "-i", source,
+            "-f", "f32le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE),
+            "-"
+        ],
+        input=stdin,
+        capture_output=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {proc.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+def decode_16k_mono(audio: Union[str, bytes]) -> np.ndarray:
+    """Decode and resample audio to 16kHz mono float32 in one ffmpeg pass"""
+    if not isinstance(audio, (bytes, bytearray)):
+        return _run_ffmpeg(audio)
+        
+    # In-memory uploads are piped through stdin
+    try:
+        return _run_ffmpeg("pipe:0", stdin=audio)
+    except RuntimeError:
+        # MP4/M4A files with their index at the end need a seekable input
+        with tempfile.NamedTemporaryFile() as tmp:
+            tmp.write(audio)
+            tmp.flush()
+            return _run_ffmpeg(tmp.name)
+
+def load_audio(audio: Union[str, bytes]) -> np.ndarray:
+    """Load an audio file path or in-memory file bytes as 16kHz mono float32 samples"""
+    if isinstance(audio, (bytes, bytearray)):
+        # No extension to go by, so let libsndfile try first
+        audio_file = io.BytesIO(audio)
+        native = True
+    else:
+        audio_file = audio
+        native = audio.lower().endswith(SOUNDFILE_EXTENSIONS)
+        
+    if native:
+        try:
+            data, sr = sf.read(audio_file, dtype="float32", always_2d=False)
+        except RuntimeError:
+            # e.g. MP3/M4A bytes or an OGG codec this libsndfile build does not support
+            return decode_16k_mono(audio)
+            
+        # Downmix to mono
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        if sr != TARGET_SAMPLE_RATE:
+            data = librosa.resample(
+                data,
+                orig_sr=sr,
+                target_sr=TARGET_SAMPLE_RATE,
+                res_type="soxr_hq"
+            )
+        return data
+        
+    return decode_16k_mono(audio)
+
+def _load_vad_model():
+    """Load the Silero VAD model on first use"""
+    global _vad_model
+    
+    if _vad_model is None:
+        from silero_vad import load_silero_vad
+        _vad_model = load_silero_vad()
+        
+    return _vad_model
+
+def split_on_speech(samples: np.ndarray) -> List[np.ndarray]:
+    """
+    Split long audio into independent chunks of at most 30 seconds.
+    
+    Clips that already fit in one model window are returned as is. Longer
+    clips are segmented with Silero VAD and consecutive speech regions are
+    packed into chunks up to the window length, so each chunk can be decoded
+    in parallel without cutting through speech.
+    """
+    if len(samples) <= VAD_CHUNK_SAMPLES:
+        return [samples]
+        
+    from silero_vad import get_speech_timestamps
+    
+    # The VAD model keeps internal state, so calls must not interleave
+    with _vad_lock:
+        timestamps = get_speech_timestamps(
+            torch.from_numpy(samples),
+            _load_vad_model(),
+            sampling_rate=TARGET_SAMPLE_RATE
+        )
+        
+    chunks = []
+    chunk_start = chunk_end = None
+    for ts in timestamps:
+        start, end = ts["start"], ts["end"]
+        
+        # Hard-split speech regions longer than a single window
+        while end - start > VAD_CHUNK_SAMPLES:
+            if chunk_start is not None:
+                chunks.append(samples[chunk_start:chunk_end])
+                chunk_start = None
+            chunks.append(samples[start:start + VAD_CHUNK_SAMPLES])
+            start += VAD_CHUNK_SAMPLES
+            
+        if chunk_start is None:
+            chunk_start, chunk_end = start, end
+        elif end - chunk_start <= VAD_CHUNK_SAMPLES:
+            chunk_end = end
+        else:
+            chunks.append(samples[chunk_start:chunk_end])
+            chunk_start, chunk_end = start, end
+            
+    if chunk_start is not None:
+        chunks.append(samples[chunk_start:chunk_end])
+        
+    return chunks
+
+def _prepare_features(processor, audio: AudioSource) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Decode audio if needed and compute (n_mels, frames) input features per chunk (blocking)"""
+    # Decode straight to 16kHz mono float32 samples
+    samples = audio if isinstance(audio, np.ndarray) else load_audio(audio)
+    
+    chunks = split_on_speech(samples)
+    if not chunks:
+        return samples, []
+        
+    # Keep features as numpy; the scheduler copies them into its staging buffer
+    if _log_mel is not None:
+        input_features = _log_mel(chunks)
+    else:
+        input_features = processor(
+            chunks, 
+            sampling_rate=TARGET_SAMPLE_RATE, 
+            return_tensors="np"
+        ).input_features
+    
+    return samples, list(input_features)
+
+async def _hash_audio(audio: AudioSource) -> str:
+    if isinstance(audio, str):
+        return await asr_cache.hash_file(audio)
+    if isinstance(audio, np.ndarray):
+        # Hash the samples in place rather than copying them with tobytes()
+        return await asr_cache.hash_bytes(memoryview(np.ascontiguousarray(audio)).cast("B"))
+    return await asr_cache.hash_bytes(audio)
+
+async def cache_transcript(
+    audio: AudioSource,
+    language: Optional[str],
+    text: str,
+    metadata: dict
+) -> None:
+    """
+    Store a transcript under the cache key of another representation of the
+    same audio, e.g. the WAV file persisted from samples that were transcribed
+    """
+    metadata = {key: value for key, value in metadata.items() if key != "cached"}
+    await asr_cache.put(
+        await _hash_audio(audio),
+        language,
+        ASR_MODEL_TAG,
+        {"text": text, "metadata": metadata}
+    )
+
+async def stream_transcription(
+    audio: AudioSource,
+    language: Optional[str] = "en",
+    **kwargs
+) -> AsyncIterator[dict]:
+    """
+    Transcribe audio using the configured ASR backend, segment by segment
+    
+    Yields {"segment": index, "text": text} as each segment is decoded
+    (not necessarily in index order), followed by one final
+    {"done": True, "text": full_text, "metadata": metadata} event.
+    
+    Transcripts are cached in Redis keyed by the SHA-256 of the audio content,
+    the language and the model, so unchanged audio is only transcribed once.
+    A cached transcript is yielded as a single segment.
+    
+    Args:
+        audio: Path to an audio file, the raw bytes of an uploaded audio file,
+            or decoded 16kHz mono float32 samples
+        language: Language code (e.g., 'en', 'zh')
+        **kwargs: Additional arguments for the model. Generation settings are
+            shared by every request in a batch and configured on the scheduler.
+            The faster-whisper backend accepts beam_size and batch_size.
+    """
+    audio_hash = await _hash_audio(audio)
+    
+    cached = await asr_cache.get_cached(audio_hash, language, ASR_MODEL_TAG)
+    if cached is not None:
+        yield {"segment": 0, "text": cached["text"]}
+        yield {
+            "done": True,
+            "text": cached["text"],
+            "metadata": {**cached["metadata"], "cached": True}
+        }
+        return
+    
+    texts = {}
+    metadata = {}
+    async for event in _stream_uncached(audio, language, **kwargs):
+        if "segment" in event:
+            texts[event["segment"]] = event["text"]
+            yield event
+        else:
+            metadata = event["metadata"]
+            
+    text = " ".join(
+        texts[i].strip() for i in sorted(texts) if texts[i].strip()
+    )
+    
+    await asr_cache.put(
+        audio_hash,
+        language,
+        ASR_MODEL_TAG,
+        {"text": text, "metadata": metadata}
+    )
+    
+    yield {"done": True, "text": text, "metadata": {**metadata, "cached": False}}
+
 async def transcribe_audio(
-    audio_file_path: str,
+    audio: AudioSource,
     language: Optional[str] = "en",
     **kwargs
 ) -> Tuple[str, dict]:
     """
-    Transcribe audio using GLM ASR Nano-2512 model
+    Transcribe audio using the configured ASR backend
+    
+    Collects the output of stream_transcription, including its caching.
     
     Args:
-        audio_file_path: Path to audio file
+        audio: Path to an audio file, the raw bytes of an uploaded audio file,
+            or decoded 16kHz mono float32 samples
         language: Language code (e.g., 'en', 'zh')
-        **kwargs: Additional arguments for the model
+        **kwargs: Additional arguments for the model (see stream_transcription)
         
     Returns:
         Tuple of (transcribed_text, metadata)
     """
     try:
-        # Load model
-        model, processor = await load_glm_model()
-        
-        # Convert to WAV if needed
-        if not audio_file_path.lower().endswith('.wav'):
-            audio_file_path = convert_audio_format(audio_file_path, "wav")
-        
-        # Load audio
-        audio = AudioSegment.from_file(audio_file_path)
-        
-        # Convert to mono and 16kHz sample rate if needed
-        if audio.channels > 1:
-            audio = audio.set_channels(1)
-        if audio.frame_rate != 16000:
-            audio = audio.set_frame_rate(16000)
-            
-        # Convert to numpy array
-        samples = np.array(audio.get_array_of_samples())
-        input_features = processor(
-            samples, 
-            sampling_rate=16000, 
-            return_tensors="pt"
-        ).input_features
-        
-        # Move to GPU if available
-        if torch.cuda.is_available():
-            input_features = input_features.to("cuda")
-        
-        # Generate transcription
-        with torch.no_grad():
-            predicted_ids = model.generate(input_features, **kwargs)
-            
-        # Decode the prediction
-        transcription = processor.batch_decode(
-            predicted_ids, 
-            skip_special_tokens=True
-        )[0]
-        
-        # Prepare metadata
-        metadata = {
-            "language": language,
-            "model": "GLM-ASR-Nano-2512",
-            "duration": len(audio) / 1000.0,  # in seconds
-            "sample_rate": audio.frame_rate,
-            "channels": audio.channels
-        }
-        
-        return transcription, metadata
+        async for event in stream_transcription(audio, language, **kwargs):
+            if event.get("done"):
+                return event["text"], event["metadata"]
+                
+        raise RuntimeError("Transcription finished without a result")
         
     except Exception as e:
         logger.error(f"Transcription failed: {str(e)}")
         raise
+
+async def _stream_uncached(
+    audio: AudioSource,
+    language: Optional[str],
+    **kwargs
+) -> AsyncIterator[dict]:
+    """
+    Transcribe audio with the configured backend, bypassing the cache
+    
+    Yields {"segment": index, "text": text} events, then a final
+    {"metadata": metadata} event.
+    """
+    loop = asyncio.get_running_loop()
+    
+    if ASR_BACKEND == "faster-whisper":
+        # faster-whisper decodes and resamples files itself via ffmpeg
+        if isinstance(audio, (bytes, bytearray)):
+            audio = io.BytesIO(audio)
+            
+        batch_size = kwargs.get("batch_size", WHISPER_BATCH_SIZE)
+        pipeline = await load_whisper_model()
+        segments, info = await loop.run_in_executor(
+            None,
+            _start_whisper_transcription,
+            pipeline,
+            audio,
+            language,
+            kwargs.get("beam_size", 5),
+            batch_size
+        )
+        
+        # Pull each lazily decoded segment in a worker thread
+        index = 0
+        while (segment := await loop.run_in_executor(None, next, segments, None)) is not None:
+            yield {"segment": index, "text": segment.text}
+            index += 1
+            
+        yield {"metadata": {
+            "language": info.language,
+            "model": ASR_MODEL_TAG,
+            "duration": info.duration,  # in seconds
+            "language_probability": info.language_probability,
+            "segments": index,
+            "batch_size": batch_size
+        }}
+        return
+    
+    # Load model and batch scheduler
+    scheduler = await get_batch_scheduler()
+    processor = scheduler.processor
+    
+    # Read, decode, segment and extract features off the event loop
+    samples, input_features = await loop.run_in_executor(
+        None, _prepare_features, processor, audio
+    )
+    
+    async def decode_segment(index: int, features: np.ndarray):
+        return index, await scheduler.submit(features, language)
+    
+    # Submit every segment at once so they are decoded in the same batch,
+    # and report each one as soon as its batch completes
+    tasks = [
+        asyncio.ensure_future(decode_segment(i, features))
+        for i, features in enumerate(input_features)
+    ]
+    batch_size = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, (text, batch_metadata) = await next_done
+            batch_size = max(batch_size, batch_metadata["batch_size"])
+            yield {"segment": index, "text": text}
     finally:
-        # Clean up temporary files if any
-        if 'temp_path' in locals() and os.path.exists(locals()['temp_path']):
-            os.unlink(locals()['temp_path'])
+        for task in tasks:
+            task.cancel()
+        # A failed batch fails every segment in it; retrieve the leftover
+        # results so they are not reported as unhandled task exceptions
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Prepare metadata
+    yield {"metadata": {
+        "language": language,
+        "model": ASR_MODEL_TAG,
+        "duration": len(samples) / TARGET_SAMPLE_RATE,  # in seconds
+        "sample_rate": TARGET_SAMPLE_RATE,
+        "channels": 1,
+        "segments": len(tasks),
+        "batch_size": batch_size
+    }}
 
 def clean_text(text: str) -> str:
     """Basic text cleaning function"""
     if not text:
         return ""
         
-    # Basic text cleaning
-    text = " ".join(text.split())  # Remove extra whitespace
-    text = text.strip()
-    
+    # Collapse runs of whitespace in a single pass
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if not text:
+        return ""
+        
+    # Ensure it ends with sentence punctuation
+    if text[-1] not in ".!?":
+        text += "."
+        
     # Capitalize first letter
-    if text:
-        text = text[0].upper() + text[1:]
-        # Ensure it ends with a period
-        if not text.endswith(('.', '!', '?')):
-            text += '.'
-            
-    return text
\ No newline at end of file
+    return text[:1].upper() + text[1:]
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("aiosqlite")
+audio = pytest.importorskip("app.api.endpoints.audio")
+
+
+@pytest.fixture
+def transcribe_url(client, monkeypatch, tmp_path):
+    calls = []
+
+    async def transcribe_audio(audio_path, **kwargs):
+        calls.append(audio_path)
+        return "re-transcribed", {"cached": False}
+
+    monkeypatch.setattr(audio, "transcribe_audio", transcribe_audio)
+
+    audio_path = tmp_path / "entry.wav"
+    audio_path.write_bytes(b"RIFF")
+    created = client.post(
+        "/api/journal/",
+        json={"content": "original", "audio_path": str(audio_path)}
+    )
+    assert created.status_code == 200
+    return f"/api/journal/{created.json()['id']}/transcribe", calls
+
+
+def test_repeat_request_with_etag_is_not_modified(client, transcribe_url):
+    url, calls = transcribe_url
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.json()["text"] == "re-transcribed"
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    repeat = client.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("variant", [
+    lambda etag: etag.removeprefix("W/"),                  # strong form
+    lambda etag: etag.removeprefix("W/").strip('"'),       # unquoted
+    lambda etag: "*",
+    lambda etag: f'"stale", {etag}',
+])
+def test_if_none_match_variants(client, transcribe_url, variant):
+    url, calls = transcribe_url
+    etag = client.get(url).headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": variant(etag)})
+    assert response.status_code == 304
+    assert len(calls) == 1
+
+
+def test_mismatched_etag_transcribes_again(client, transcribe_url):
+    url, calls = transcribe_url
+    client.get(url)
+
+    response = client.get(url, headers={"If-None-Match": 'W/"stale"'})
+    assert response.status_code == 200
+    assert len(calls) == 2
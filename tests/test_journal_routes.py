@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("aiosqlite")
+audio = pytest.importorskip("app.api.endpoints.audio")
+
+
+def test_create_and_list_journal_entries(client):
+    created = client.post("/api/journal/", json={"content": "first entry"})
+    assert created.status_code == 200
+    body = created.json()
+    assert body["content"] == "first entry"
+    assert body["user_id"] == 1
+    assert body["updated_at"] is not None
+
+    listed = client.get("/api/journal/")
+    assert listed.status_code == 200
+    assert [entry["id"] for entry in listed.json()] == [body["id"]]
+
+
+def test_create_journal_from_text(client):
+    response = client.post("/api/journal/text/", params={"content": "  hello   world  "})
+    assert response.status_code == 200
+    assert response.json()["audio_path"] is None
+
+
+@pytest.fixture
+def stub_audio_pipeline(monkeypatch, tmp_path):
+    np = pytest.importorskip("numpy")
+
+    async def read_audio_upload(audio_file):
+        return b"audio"
+
+    async def transcribe_audio(samples, language=None, beam_size=5):
+        return "spoken entry", {}
+
+    async def cache_transcript(audio_path, language, text, metadata):
+        pass
+
+    monkeypatch.setattr(audio, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(audio, "read_audio_upload", read_audio_upload)
+    monkeypatch.setattr(audio, "load_audio", lambda data: np.zeros(1600, dtype=np.float32))
+    monkeypatch.setattr(audio, "transcribe_audio", transcribe_audio)
+    monkeypatch.setattr(audio, "cache_transcript", cache_transcript)
+    return tmp_path
+
+
+def test_create_journal_from_audio(client, stub_audio_pipeline):
+    response = client.post("/api/journal/audio/", files={"audio_file": ("a.wav", b"audio")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["content"] == "spoken entry"
+    assert [p.name for p in stub_audio_pipeline.iterdir()] == [body["audio_path"].rsplit("/", 1)[-1]]
+
+
+def test_create_journal_from_audio_removes_wav_on_db_failure(client, stub_audio_pipeline, monkeypatch):
+    def failing_entry(**kwargs):
+        raise RuntimeError("db unavailable")
+
+    monkeypatch.setattr(audio, "JournalEntry", failing_entry)
+    response = client.post("/api/journal/audio/", files={"audio_file": ("a.wav", b"audio")})
+    assert response.status_code == 500
+    assert list(stub_audio_pipeline.iterdir()) == []
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+audio_processor = pytest.importorskip("app.services.audio_processor")
+
+SAMPLE_RATE = 16000
+
+@pytest.fixture(scope="module")
+def feature_extractor():
+    return transformers.WhisperFeatureExtractor()
+
+def _hf_features(feature_extractor, chunks):
+    return feature_extractor(
+        chunks,
+        sampling_rate=SAMPLE_RATE,
+        return_tensors="np"
+    ).input_features
+
+@pytest.mark.parametrize("seconds", [0.25, 1, 12.5, 30, 41])
+def test_log_mel_matches_whisper_feature_extractor(feature_extractor, seconds):
+    rng = np.random.default_rng(0)
+    chunks = [
+        rng.uniform(-1, 1, int(seconds * SAMPLE_RATE)).astype(np.float32),
+        (0.1 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32),
+    ]
+    extractor = audio_processor.LogMelExtractor(feature_extractor)
+
+    expected = _hf_features(feature_extractor, chunks)
+    actual = extractor(chunks)
+
+    assert actual.shape == expected.shape
+    assert np.allclose(actual, expected, atol=1e-4)
+
+def test_log_mel_matches_for_silence(feature_extractor):
+    chunks = [np.zeros(SAMPLE_RATE * 15, dtype=np.float32)]
+    extractor = audio_processor.LogMelExtractor(feature_extractor)
+
+    assert np.allclose(
+        extractor(chunks),
+        _hf_features(feature_extractor, chunks),
+        atol=1e-4
+    )
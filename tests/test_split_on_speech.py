@@ -0,0 +1,77 @@
+import sys
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+audio_processor = pytest.importorskip("app.services.audio_processor")
+
+from app.services.audio_processor import TARGET_SAMPLE_RATE, VAD_CHUNK_SAMPLES, split_on_speech
+
+SECOND = TARGET_SAMPLE_RATE
+
+
+@pytest.fixture
+def speech(monkeypatch):
+    """Stub silero_vad so each test declares the speech regions it wants"""
+    regions = []
+    stub = types.ModuleType("silero_vad")
+    stub.load_silero_vad = lambda: object()
+    stub.get_speech_timestamps = lambda audio, model, sampling_rate: [
+        {"start": start, "end": end} for start, end in regions
+    ]
+    monkeypatch.setitem(sys.modules, "silero_vad", stub)
+    monkeypatch.setattr(audio_processor, "_vad_model", None)
+    return regions
+
+
+def _samples(seconds):
+    # Sample values are their own index so chunks can be traced back
+    return np.arange(int(seconds * SECOND), dtype=np.float32)
+
+
+def _bounds(chunks):
+    return [(int(chunk[0]), int(chunk[-1]) + 1) for chunk in chunks]
+
+
+def test_short_clip_is_returned_unchanged(speech):
+    samples = _samples(10)
+    chunks = split_on_speech(samples)
+    assert len(chunks) == 1
+    assert chunks[0] is samples
+
+
+def test_no_speech_yields_no_chunks(speech):
+    assert split_on_speech(_samples(60)) == []
+
+
+def test_neighbouring_regions_are_packed(speech):
+    speech.extend([
+        (1 * SECOND, 5 * SECOND),
+        (6 * SECOND, 20 * SECOND),
+        (22 * SECOND, 30 * SECOND),
+        (35 * SECOND, 50 * SECOND),
+    ])
+    chunks = split_on_speech(_samples(60))
+    # The first three fit in one 30s window (silence between them included);
+    # the fourth would overflow it and starts a new chunk
+    assert _bounds(chunks) == [(1 * SECOND, 30 * SECOND), (35 * SECOND, 50 * SECOND)]
+    assert all(len(chunk) <= VAD_CHUNK_SAMPLES for chunk in chunks)
+
+
+def test_long_region_is_hard_split(speech):
+    speech.extend([
+        (0, 2 * SECOND),
+        (5 * SECOND, 75 * SECOND),
+        (76 * SECOND, 80 * SECOND),
+    ])
+    chunks = split_on_speech(_samples(90))
+    assert _bounds(chunks) == [
+        (0, 2 * SECOND),
+        (5 * SECOND, 35 * SECOND),
+        (35 * SECOND, 65 * SECOND),
+        # The 10s remainder packs with the following region
+        (65 * SECOND, 80 * SECOND),
+    ]
+    assert all(len(chunk) <= VAD_CHUNK_SAMPLES for chunk in chunks)